@@ -1,126 +1,268 @@
+import io
+import os
 import networkx as nx
-import itertools
+from collections import defaultdict
 from pulp import *
 from fractions import Fraction
-
-
-def fractional_clique_cover(G):
-    # Create xs (init to 0) for all subsets of vertices
-    xs = {}
-    for L in range(0, len(G.nodes) + 1):
-        for subset in itertools.combinations(G.nodes, L):
-            xs[subset] = 0
-
+from math import inf
+
+try:
+    import highspy
+    import numpy as np
+except ImportError:
+    # LPs are solved through PuLP instead
+    highspy = None
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    # Shannon entropy constraints are generated in plain Python instead
+    njit = None
+
+
+def get_solver():
+    # Pick the fastest LP solver PuLP can reach (only used when highspy is not installed, see solve_lp)
+    # Gurobi runs in-process so avoids writing the LP to disk
+    available = listSolvers(onlyAvailable=True)
+    if "GUROBI" in available:
+        return GUROBI(msg=False)
+    if "HiGHS_CMD" in available:
+        return HiGHS_CMD(msg=False)
+    # Default - CBC bundled with PuLP
+    return PULP_CBC_CMD(msg=False, threads=os.cpu_count())
+
+
+solver = get_solver()
+# HiGHS instance shared by every LP solved directly through highspy (see get_highs)
+highs = None
+
+
+def get_highs():
+    # Reuse one HiGHS instance rather than creating a new one per LP
+    global highs
+    if highs is None:
+        highs = highspy.Highs()
+        highs.setOptionValue("output_flag", False)
+    return highs
+
+
+def solve_lp(name, sense, costs, col_upper, starts, index, value, row_lower, row_upper):
+    # Constraint matrix is given row-wise (CSR) - row r has coefficients value[starts[r]:starts[r+1]]
+    # on columns index[starts[r]:starts[r+1]], bounded by row_lower[r] & row_upper[r]
+    # All columns have a lower bound of 0
+    # Returns the solution status & the optimal value of each column
+    if highspy is not None:
+        # Pass the arrays straight to HiGHS
+        lp = highspy.HighsLp()
+        lp.num_col_ = len(costs)
+        lp.num_row_ = len(row_lower)
+        lp.sense_ = highspy.ObjSense.kMinimize if sense == LpMinimize else highspy.ObjSense.kMaximize
+        lp.col_cost_ = np.asarray(costs, dtype=np.float64)
+        lp.col_lower_ = np.zeros(len(costs))
+        lp.col_upper_ = np.asarray(col_upper, dtype=np.float64)
+        lp.row_lower_ = np.asarray(row_lower, dtype=np.float64)
+        lp.row_upper_ = np.asarray(row_upper, dtype=np.float64)
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.num_col_ = lp.num_col_
+        lp.a_matrix_.num_row_ = lp.num_row_
+        lp.a_matrix_.start_ = np.asarray(starts, dtype=np.int32)
+        lp.a_matrix_.index_ = np.asarray(index, dtype=np.int32)
+        lp.a_matrix_.value_ = np.asarray(value, dtype=np.float64)
+
+        h = get_highs()
+        h.clearModel()
+        h.passModel(lp)
+        h.run()
+        return h.modelStatusToString(h.getModelStatus()), list(h.getSolution().col_value)
+
+    # No highspy - build the same problem with PuLP
+    prob = LpProblem(name, sense)
+    xs = [LpVariable("X" + str(col), lowBound=0, upBound=None if upper == inf else upper, cat='Continuous')
+          for col, upper in enumerate(col_upper)]
+    prob += LpAffineExpression((xs[col], cost) for col, cost in enumerate(costs) if cost)
+    for row in range(len(row_lower)):
+        expr = LpAffineExpression((xs[index[k]], value[k]) for k in range(starts[row], starts[row + 1]))
+        if row_lower[row] == row_upper[row]:
+            prob += expr == row_lower[row]
+            continue
+        if row_lower[row] != -inf:
+            prob += expr >= row_lower[row]
+        if row_upper[row] != inf:
+            prob += expr <= row_upper[row]
+    prob.solve(solver)
+    return LpStatus[prob.status], [x.varValue for x in xs]
+
+
+def lattice_rows(n, offset):
+    # Constraints 4. & 5. of shannon_entropy (same order) for n nodes as CSR arrays
+    # Returns the end of each row (offset by offset, the entries already in the matrix), index & value
+    monotonic = n * ((1 << n) >> 1)
+    submodular = n * (n - 1) // 2 * ((1 << n) >> 2)
+    ends = np.empty(monotonic + submodular, dtype=np.int64)
+    index = np.empty(2 * monotonic + 4 * submodular, dtype=np.int64)
+    value = np.empty(2 * monotonic + 4 * submodular, dtype=np.float64)
+    row, k = 0, 0
+    for mask in range(1 << n):
+        for u in range(n):
+            if mask >> u & 1:
+                continue
+            S = mask | 1 << u
+            index[k], index[k + 1] = S, mask  # 4.
+            value[k], value[k + 1] = 1, -1
+            k += 2
+            ends[row] = offset + k
+            row += 1
+            for v in range(u + 1, n):
+                if mask >> v & 1:
+                    continue
+                T = mask | 1 << v
+                index[k], index[k + 1], index[k + 2], index[k + 3] = S, T, S | T, S & T  # 5.
+                value[k], value[k + 1], value[k + 2], value[k + 3] = 1, 1, -1, -1
+                k += 4
+                ends[row] = offset + k
+                row += 1
+    return ends, index, value
+
+
+if njit is not None:
+    lattice_rows = njit(cache=True)(lattice_rows)
+
+
+def to_fraction(val):
+    # LP value as a fraction (denominator <= 100)
+    return Fraction.from_float(val).limit_denominator(100)
+
+
+def fractional_clique_cover(G, node_bit):
+    # node_bit maps each node to its bit in a subset mask (see calculate)
     # Clique is a complete subgraph - K(G) denotes all cliques in G (includes empty set & singular nodes)
-    # Calculate K(G) (all cliques)
-    K = list(nx.enumerate_all_cliques(G))
-
-    # Formulate as LP problem
-    prob = LpProblem("Fraction Clique Cover", LpMinimize)
-
-    # Problem Vars
-    lp_xs = LpVariable.dicts("Xs", xs, lowBound=0, upBound=None, cat='Continuous')
-
-    # Add objective function first
-    prob += lpSum(lp_xs), "Sum of Xs"
-
-    # Add constraints to problem
-    # 1. Xs = 0 iff S not a clique -> redundant (as explained in report)
-
-    # 2. For any vertex v, the sum of the weights of the cliques containing v is >= 1
+    # LP has a column for each clique (non-cliques need no variable as Xs = 0 iff S not a clique)
+
+    # Index cliques by the vertices they contain & find the mask of each clique
+    # Single pass over K(G) as it is enumerated, so the cliques themselves are never stored
+    cliques_by_vertex = defaultdict(list)
+    masks = []
+    for col, clique in enumerate(nx.enumerate_all_cliques(G)):
+        mask = 0
+        for vertex in clique:
+            cliques_by_vertex[vertex].append(col)
+            mask |= node_bit[vertex]
+        masks.append(mask)
+
+    # Constraints - one row per vertex
+    # For any vertex v, the sum of the weights of the cliques containing v is >= 1
+    starts, index = [0], []
     for vertex in G.nodes:
-        cliques_containing_v = []
-        for clique in K:
-            if vertex in clique:
-                cliques_containing_v.append(clique)
-        # Cliques containing v now contains the indexes of all
-        # cliques that contain the current vertex
-        prob += lpSum(lp_xs[tuple(x)] for x in cliques_containing_v) >= 1  # 2.
-
-    # Solve
-    prob.solve()
-
-    print("Fractional Clique Cover:")
-    print("Status -", LpStatus[prob.status])
-    total = 0
-    for item in lp_xs:
-        val = lp_xs[item].varValue
-        total += val
+        index += cliques_by_vertex[vertex]
+        starts.append(len(index))
+    value = [1] * len(index)
+    row_lower = [1] * len(G.nodes)
+    row_upper = [inf] * len(G.nodes)
 
-    total = Fraction.from_float(total).limit_denominator(100)
+    # Objective - minimise the sum of Xs
+    status, values = solve_lp("Fraction Clique Cover", LpMinimize, [1] * len(masks), [inf] * len(masks),
+                              starts, index, value, row_lower, row_upper)
 
-    print("Sum of Optimal Xs Vals -", total)
-    return total, lp_xs
+    total = sum(values)
 
+    total = to_fraction(total)
 
-def shannon_entropy(G):
-    # Create xs (init to 0) for all subsets of vertices
-    xs = {}
-    for L in range(0, len(G.nodes) + 1):
-        for subset in itertools.combinations(G.nodes, L):
-            xs[subset] = 0
+    return total, dict(zip(masks, values)), status
 
-    # Formulate as LP problem
-    prob = LpProblem("Shannon Entropy", LpMaximize)
 
-    # Problem Var
-    lp_xs = LpVariable.dicts("Xs", xs, lowBound=0, upBound=None, cat='Continuous')
+def shannon_entropy(G, node_bit):
+    # node_bit maps each node to its bit in a subset mask (see calculate)
+    # LP has a column for each subset, column mask is the variable X_S for the subset S represented by mask
+    n = len(node_bit)
 
-    # Add objective function first
-    prob += lpSum(lp_xs[tuple(list(xs.keys())[-1])]), "Value of Xv"
+    # Objective - maximise X_V
+    costs = [0] * (1 << n)
+    costs[-1] = 1
 
-    # Add problem constraints
     # 1. X_empty_set = 0
-    prob += lp_xs[tuple()] == 0
-
     # 2. X_v <= 1 i.e. for any subset with a singular node, its value <= 1
-    for item in lp_xs:
-        if len(item) == 1:
-            prob += lp_xs[item] <= 1
+    # Both are bounds on the columns rather than constraints
+    col_upper = [inf] * (1 << n)
+    col_upper[0] = 0
+    for i in range(n):
+        col_upper[1 << i] = 1
+
+    # Constraints - built row-wise
+    starts, index, value = [0], [], []
 
     # 3. X_N(v)_union_v - X_N(v) = 0
-    for vertex in G.nodes:
-        N_v = list(G.neighbors(vertex))
-        N_v_u_v = list(G.neighbors(vertex))
-        N_v_u_v.append(vertex)
-        # Sort so in key order (as otherwise throws key error)
-        N_v.sort()
-        N_v_u_v.sort()
-        prob += lpSum(lp_xs[tuple(N_v_u_v)]-lp_xs[tuple(N_v)]) == 0
+    # Neighbours read once per vertex from the adjacency, each N(v) is kept as a mask
+    for vertex, neighbours in G.adjacency():
+        N_v = 0
+        for neighbour in neighbours:
+            N_v |= node_bit[neighbour]
+        index += (N_v | node_bit[vertex], N_v)
+        value += (1, -1)
+        starts.append(len(index))
+    equalities = len(starts) - 1
 
     # 4. X_T - X_S >= 0 where S is a subset of T
+    # Only posted for T = S + {v}, every other pair follows by transitivity
     # 5. X_S + X_T - X_S_union_T - X_S_intersect_T >= 0
-    # If S is a subset of T, then S union T == T & S intersect T is S == S
-    for x in range(len(xs)-2):
-        S = list(xs)[x]
-        for y in range(x+1, len(xs)-1):
-            T = list(xs)[y]
-            # If S is subset of T
-            if set(S).issubset(T):
-                prob += lpSum(lp_xs[T] - lp_xs[S]) >= 0  # 4.
-            if not set(S).issubset(T):  # This constraint is redundant if S is a subset of T
-                X_s_u_t = list(set(S + T))  # Union
-                X_s_n_t = [val for val in S if val in T]  # Intersection
-                X_s_u_t.sort()  # Sort to prevent key error
-                X_s_n_t.sort()
-                prob += lpSum(lp_xs[S] + lp_xs[T] - lp_xs[tuple(X_s_u_t)] - lp_xs[tuple(X_s_n_t)]) >= 0  # 5.
+    # Only posted for S = R + {u}, T = R + {v} (u, v not in R), every other pair follows from these
+    if njit is not None:
+        # Compiled version of the loop below
+        ends, lattice_index, lattice_value = lattice_rows(n, len(index))
+        starts = np.concatenate((starts, ends))
+        index = np.concatenate((index, lattice_index))
+        value = np.concatenate((value, lattice_value))
+    else:
+        for mask in range(1 << n):
+            for u in range(n):
+                if mask >> u & 1:
+                    continue
+                S = mask | 1 << u
+                index += (S, mask)  # 4.
+                value += (1, -1)
+                starts.append(len(index))
+                for v in range(u + 1, n):
+                    if mask >> v & 1:
+                        continue
+                    T = mask | 1 << v
+                    index += (S, T, S | T, S & T)  # 5.
+                    value += (1, 1, -1, -1)
+                    starts.append(len(index))
+
+    rows = len(starts) - 1
+    row_lower = [0] * rows
+    row_upper = [0] * equalities + [inf] * (rows - equalities)
 
     # Solve problem
-    prob.solve()
+    status, values = solve_lp("Shannon Entropy", LpMaximize, costs, col_upper,
+                              starts, index, value, row_lower, row_upper)
 
-    print("Shannon Entropy: ")
-    print("Status -", LpStatus[prob.status])
-    val = lp_xs[tuple(list(lp_xs)[-1])].varValue
+    val = values[-1]
+
+    val = to_fraction(val)
 
-    val = Fraction.from_float(val).limit_denominator(100)
-    print("Xv -", val)
+    return val, dict(enumerate(values)), status
 
-    return val, lp_xs
+
+def mask_to_subset(mask, nodes):
+    # Subset of nodes (sorted) represented by mask
+    return tuple(node for i, node in enumerate(nodes) if mask >> i & 1)
 
 
 def calculate(G):
-    fcc, fcc_vals = fractional_clique_cover(G)
-    shann_ent, shannon_vals = shannon_entropy(G)
+    # Work shared by both LPs is done once here
+    # Subsets of vertices are represented as bitmasks over the sorted nodes (bit i set iff nodes[i] in subset)
+    node_bit = {node: 1 << i for i, node in enumerate(sorted(G.nodes))}
+
+    fcc, fcc_vals, fcc_status = fractional_clique_cover(G, node_bit)
+    shann_ent, shannon_vals, shannon_status = shannon_entropy(G, node_bit)
+
+    print("Fractional Clique Cover:")
+    print("Status -", fcc_status)
+    print("Sum of Optimal Xs Vals -", fcc)
+    print("Shannon Entropy: ")
+    print("Status -", shannon_status)
+    print("Xv -", shann_ent)
     return fcc, shann_ent, fcc_vals, shannon_vals
 
 
@@ -181,25 +323,43 @@ def load(filename):
         print("Something went wrong... likely invalid file format?")
 
 
+def format_value(val):
+    # Value as a fraction, most values are 0 so skip the conversion for those
+    if val == 0:
+        return "0"
+    return str(to_fraction(val))
+
+
+def by_subset(vals, nodes):
+    # (subset, value) pairs from values keyed by mask
+    # Ordered by size then lexicographically (as itertools.combinations lists subsets)
+    items = [(mask_to_subset(mask, nodes), val) for mask, val in vals.items()]
+    items.sort(key=lambda item: (len(item[0]), item[0]))
+    return items
+
+
 def save(fcc, shannon_ent, fcc_vals, shannon_vals, G):
     if fcc == -1 or shannon_ent == -1:
         print("No results to save. (Please run calculate before attempting to save.)")
         return
     # Save fcc & shannon_ent in file w inputted filename
     filename = input("Name of file to be saved: ")
+    # Build the whole file in memory & write it at once
+    buf = io.StringIO()
+    buf.write("Graph: \n")
+    buf.write("Number Of Nodes: " + str(G.number_of_nodes()))
+    buf.write("\nEdges: " + str(G.edges))
+    buf.write("\n\nResults:")
+    buf.write("\nFractional Clique Cover - " + str(fcc))
+    buf.write("\nShannon Entropy - " + str(shannon_ent))
+    buf.write("\n\nFractional Clique Cover (All Values):\n")
+    # Values are keyed by subset mask
+    nodes = sorted(G.nodes)
+    buf.writelines([str(subset) + " - " + format_value(val) + "\n" for subset, val in by_subset(fcc_vals, nodes)])
+    buf.write("\n\nShannon Entropy (All Values):\n")
+    buf.writelines([str(subset) + " - " + format_value(val) + "\n" for subset, val in by_subset(shannon_vals, nodes)])
     with open(filename + ".txt", 'w+') as file:
-        file.write("Graph: \n")
-        file.write("Number Of Nodes: " + str(G.number_of_nodes()))
-        file.write("\nEdges: " + str(G.edges))
-        file.write("\n\nResults:")
-        file.write("\nFractional Clique Cover - " + str(fcc))
-        file.write("\nShannon Entropy - " + str(shannon_ent))
-        file.write("\n\nFractional Clique Cover (All Values):\n")
-        for item in fcc_vals:
-            file.write(str(item) + " - " + str(Fraction.from_float(fcc_vals[item].varValue).limit_denominator(100)) + "\n")
-        file.write("\n\nShannon Entropy (All Values):\n")
-        for item in shannon_vals:
-            file.write(str(item) + " - " + str(Fraction.from_float(shannon_vals[item].varValue).limit_denominator(100)) + "\n")
+        file.write(buf.getvalue())
 
     print("Saving of " + filename + ".txt successful.")
 
@@ -244,4 +404,5 @@ def main():
 
 
 # Call main loop
-main()
+if __name__ == "__main__":
+    main()